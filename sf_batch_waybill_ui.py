@@ -17,13 +17,21 @@
 11. row_now += 1
 12. 读取新行物流单号, 若= "END" 则程序结束; 否则重复 5~11
 
+增量刷新 (勾选 [增量刷新]): 点击 [确认] 时先计算路由/状态区域文字的指纹, 与上次记录
+(output/.fingerprints.json) 相同且 PDF 仍存在则跳过打印; 有变化时先渲染到临时文件, 成功后旧 PDF 移入
+output/history/ 并替换为新版本 (渲染或替换失败时旧 PDF 保持原位).
+
 注意: 不做自动验证码 / 展开详情; 不做列名模糊匹配; Excel 文件在首次成功选择后可复用。
 """
 from __future__ import annotations
 import os
 import sys
 import base64
+import hashlib
+import json
+import shutil
 import threading
+import time
 from dataclasses import dataclass
 from typing import Optional, List
 
@@ -81,6 +89,137 @@ def create_driver(headless: bool = False) -> WebDriver:
     return driver
 
 
+# 路由/状态区域的精确选择器 (需对照官网详情页确认后填写, 如 "#routeList"). 只有恰好匹配一个元素时才使用,
+# 否则退回整页正文: 整页指纹可能因无关内容变化而多打印一次, 但不会漏掉状态变化. 退回整页时状态栏会标注 "(整页比对)".
+# 不要填写 [class*=...] 之类的模糊选择器, 它们可能命中导航栏/搜索框, 导致指纹永不变化而漏打.
+ROUTE_SELECTORS: List[str] = []
+FINGERPRINT_FILE = ".fingerprints.json"
+HISTORY_DIR = "history"
+
+
+def resolve_output_dir(output_dir: str = "output") -> str:
+    """打包后相对 exe 所在目录, 否则相对当前工作目录."""
+    if getattr(sys, 'frozen', False):
+        base_dir = os.path.dirname(sys.executable)
+    else:
+        base_dir = os.getcwd()
+    return os.path.join(base_dir, output_dir)
+
+
+def compute_route_fingerprint(driver: WebDriver) -> tuple[Optional[str], Optional[str]]:
+    """读取路由/状态区域可见文字, 压缩空白后取 sha256.
+
+    返回 (指纹, 命中的选择器). ROUTE_SELECTORS 中某个选择器恰好匹配一个有文字的元素时只取该元素,
+    否则取整页正文, 此时选择器为 None. 读取失败时指纹为 None (调用方应视为已变化).
+    """
+    script = """
+        for (const sel of arguments[0]) {
+            const found = document.querySelectorAll(sel);
+            if (found.length === 1 && found[0].innerText && found[0].innerText.trim()) { return [found[0].innerText, sel]; }
+        }
+        return [document.body ? document.body.innerText : '', null];
+    """
+    try:
+        text, selector = driver.execute_script(script, ROUTE_SELECTORS) or ("", None)
+    except Exception as e:
+        print(f"读取页面内容失败: {e}")
+        return None, None
+    normalized = " ".join((text or "").split())
+    if not normalized:
+        return None, selector
+    if selector is None:
+        print("指纹: 未命中 ROUTE_SELECTORS 中的路由区域, 使用整页正文 (页面其他内容变化也会触发重新生成)")
+    return hashlib.sha256(normalized.encode("utf-8")).hexdigest(), selector
+
+
+class FingerprintStore:
+    """按 PDF 文件名记录上次生成时的页面指纹及历史版本 (JSON 文件)."""
+
+    def __init__(self, output_dir: str = "output"):
+        self.out_dir = resolve_output_dir(output_dir)
+        self.path = os.path.join(self.out_dir, FINGERPRINT_FILE)
+        self.data: dict = {}
+        if os.path.exists(self.path):
+            try:
+                with open(self.path, "r", encoding="utf-8") as f:
+                    self.data = json.load(f)
+            except Exception as e:
+                print(f"读取指纹记录失败, 将重新记录: {e}")
+
+    def is_unchanged(self, basename: str, fingerprint: Optional[str]) -> bool:
+        entry = self.data.get(basename)
+        return (
+            fingerprint is not None
+            and entry is not None
+            and entry.get("fingerprint") == fingerprint
+            and os.path.exists(entry.get("pdf", ""))
+        )
+
+    def archive(self, basename: str) -> Optional[str]:
+        """将现有 PDF 移入 history/<basename>-<时间>.pdf, 返回归档路径."""
+        entry = self.data.get(basename)
+        pdf = entry.get("pdf") if entry else os.path.join(self.out_dir, f"{basename}.pdf")
+        if not pdf or not os.path.exists(pdf):
+            return None
+        hist_dir = os.path.join(self.out_dir, HISTORY_DIR)
+        os.makedirs(hist_dir, exist_ok=True)
+        stamp = time.strftime("%Y%m%d-%H%M%S", time.localtime(os.path.getmtime(pdf)))
+        dest = os.path.join(hist_dir, f"{basename}-{stamp}.pdf")
+        n = 1
+        while os.path.exists(dest):  # 同一秒内多次归档时避免覆盖已有历史版本
+            dest = os.path.join(hist_dir, f"{basename}-{stamp}-{n}.pdf")
+            n += 1
+        shutil.move(pdf, dest)
+        if entry is not None:
+            entry.setdefault("history", []).append({
+                "fingerprint": entry.get("fingerprint"),
+                "pdf": dest,
+                "generated_at": entry.get("generated_at"),
+            })
+        return dest
+
+    def promote(self, basename: str, rendered_path: str) -> tuple[str, Optional[str]]:
+        """新 PDF 已渲染到临时文件后调用: 旧版本移入 history, 再把临时文件改为正式文件名.
+
+        返回 (正式路径, 归档路径). 失败时抛出 OSError, 旧 PDF 保持原位, 临时文件由调用方清理.
+        """
+        final = os.path.join(self.out_dir, f"{basename}.pdf")
+        archived = self.archive(basename)
+        try:
+            os.replace(rendered_path, final)
+        except OSError:
+            if archived:
+                shutil.move(archived, final)
+                entry = self.data.get(basename)
+                if entry and entry.get("history"):
+                    entry["history"].pop()
+            raise
+        return final, archived
+
+    def record(self, basename: str, fingerprint: Optional[str], pdf_path: str) -> None:
+        entry = self.data.setdefault(basename, {})
+        entry.update({
+            "fingerprint": fingerprint,
+            "pdf": pdf_path,
+            "generated_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+        })
+        self.save()
+
+    def touch(self, basename: str) -> None:
+        """内容未变化时只记录本次检查时间."""
+        entry = self.data.get(basename)
+        if entry is not None:
+            entry["checked_at"] = time.strftime("%Y-%m-%d %H:%M:%S")
+            self.save()
+
+    def save(self) -> None:
+        os.makedirs(self.out_dir, exist_ok=True)
+        tmp = self.path + ".tmp"
+        with open(tmp, "w", encoding="utf-8") as f:
+            json.dump(self.data, f, ensure_ascii=False, indent=2)
+        os.replace(tmp, self.path)
+
+
 def print_to_pdf(driver: WebDriver, basename: str, output_dir: str = "output", header_text: Optional[str] = None) -> Optional[str]:
     """生成带每页右上角追踪文字与右下页码的 PDF.
 
@@ -91,11 +230,7 @@ def print_to_pdf(driver: WebDriver, basename: str, output_dir: str = "output", h
     局限: header/footer 默认在纸张 margin 区域, 不是页面主体第一行; 若需强制正文下移已通过插入覆盖层实现。
     """
     try:
-        if getattr(sys, 'frozen', False):
-            base_dir = os.path.dirname(sys.executable)
-        else:
-            base_dir = os.getcwd()
-        out_dir = os.path.join(base_dir, output_dir)
+        out_dir = resolve_output_dir(output_dir)
         os.makedirs(out_dir, exist_ok=True)
         # 构造 header/footer HTML
         hdr_html = ""
@@ -204,6 +339,8 @@ class BatchUI:
         self.excel_path: Optional[str] = None
         self.sheet_btn_frame = None
         self.month_prefix: Optional[str] = None  # 从 sheet 名提取的首个数字序列 (X)
+        self.refresh_var = tk.BooleanVar(value=False)  # 增量刷新: 内容未变化时跳过 PDF
+        self.fingerprints = FingerprintStore()
 
         # 第一行: 选择Excel
         top1 = tk.Frame(self.root)
@@ -229,6 +366,7 @@ class BatchUI:
         self.btn_next.pack(side='left', padx=4)
         self.btn_end = tk.Button(top3, text="结束", width=10, command=self.on_end)
         self.btn_end.pack(side='left', padx=4)
+        tk.Checkbutton(top3, text="增量刷新", variable=self.refresh_var).pack(side='left', padx=4)
 
         self.status_var = tk.StringVar(value="请选择 Excel, 输入序号, 点击 '序号'")
         tk.Label(self.root, textvariable=self.status_var, fg='#333').pack(fill='x', pady=4)
@@ -356,13 +494,47 @@ class BatchUI:
 
             # 使用自定义文件名 序号{xu}-{waybill}.pdf
             custom_name = f"{prefix}序号{self.current_seq_value}-{waybill}"
-            pdf_path = print_to_pdf(self.driver, custom_name, header_text=header_text)
-            if pdf_path:
-                self.status_var.set(f"PDF 已生成: {os.path.basename(pdf_path)} 点击 '下一单'")
+            # 每次都记录指纹, 便于后续增量刷新比对; 仅在勾选增量刷新时据此跳过打印
+            fingerprint, route_selector = compute_route_fingerprint(self.driver)
+            refresh = self.refresh_var.get()
+            # 增量刷新且退回整页比对时在状态栏标注, 便于理解为何未跳过
+            scope_note = " (整页比对)" if refresh and fingerprint and route_selector is None else ""
+            if refresh and self.fingerprints.is_unchanged(custom_name, fingerprint):
+                try:
+                    self.fingerprints.touch(custom_name)
+                except Exception as e:
+                    print(f"指纹记录保存失败: {e}")
+                self.status_var.set(f"内容未变化, 跳过: {custom_name}.pdf{scope_note} 点击 '下一单'")
                 self.btn_next.config(state=tk.NORMAL)
-            else:
+                return
+            # 增量刷新时先渲染到临时文件, 成功后再归档旧版本并替换; 渲染或替换失败时旧 PDF 保持原位
+            render_name = f"{custom_name}.rendering" if refresh else custom_name
+            pdf_path = print_to_pdf(self.driver, render_name, header_text=header_text)
+            if not pdf_path:
                 self.status_var.set("生成失败, 可重试 '确认'")
                 self.btn_confirm.config(state=tk.NORMAL)
+                return
+            if refresh:
+                try:
+                    pdf_path, archived = self.fingerprints.promote(custom_name, pdf_path)
+                except Exception as e:
+                    try:
+                        os.remove(pdf_path)
+                    except OSError:
+                        pass
+                    self.status_var.set(f"替换旧 PDF 失败 (文件是否被打开?): {e} 关闭后可重试 '确认'")
+                    self.btn_confirm.config(state=tk.NORMAL)
+                    return
+                if archived:
+                    print(f"旧版本已归档: {archived}")
+            try:
+                self.fingerprints.record(custom_name, fingerprint, pdf_path)
+            except Exception as e:
+                self.status_var.set(f"PDF 已生成, 但指纹记录保存失败: {e} 点击 '下一单'")
+                self.btn_next.config(state=tk.NORMAL)
+                return
+            self.status_var.set(f"PDF 已生成: {os.path.basename(pdf_path)}{scope_note} 点击 '下一单'")
+            self.btn_next.config(state=tk.NORMAL)
         threading.Thread(target=_pdf, daemon=True).start()
 
     def on_next(self):
@@ -6,6 +6,9 @@
 
 使用:
     python sf_waybill_detail.py SF1234567890123
+    python sf_waybill_detail.py SF1 SF2 SF3            # 多票: 复用同一浏览器依次生成 PDF
+    type list.txt | python sf_waybill_detail.py --stdin
+    python sf_waybill_detail.py --serve --port 8765   # 常驻服务模式 (本地 HTTP API)
 
 依赖: selenium, webdriver-manager
 
@@ -16,11 +19,19 @@
 from __future__ import annotations
 import sys
 import time
-from dataclasses import dataclass
+from collections import deque
+from dataclasses import dataclass, field
 from typing import Optional
 import base64
+import json
 import os
+import queue
+import re
+import shutil
+import socketserver
 import threading
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import urlparse, parse_qs
 try:
     import tkinter as tk
     from tkinter import messagebox
@@ -35,6 +46,13 @@ from selenium.webdriver.support import expected_conditions as EC
 from selenium.webdriver.remote.webdriver import WebDriver
 
 BASE_URL = "https://www.sf-express.com/chn/sc/waybill/waybill-detail/{waybill}"
+WARMUP_URL = "https://www.sf-express.com/chn/sc"
+# 运单号同时用于 URL 与输出文件名, 只接受字母数字, 防止路径穿越
+WAYBILL_PATTERN = re.compile(r"^[A-Za-z0-9]{6,32}$")
+
+
+def is_valid_waybill(waybill: str) -> bool:
+    return bool(WAYBILL_PATTERN.match(waybill))
 
 @dataclass
 class WaybillResult:
@@ -42,6 +60,7 @@ class WaybillResult:
     page_title: str
     pdf_path: Optional[str] = None
     driver: Optional[WebDriver] = None  # 返回以便后续 UI 继续使用
+    cache_stats: Optional[dict] = None  # 本次页面资源的缓存命中统计
 
 
 def _detect_edge_binary() -> Optional[str]:
@@ -79,11 +98,154 @@ def _find_bundled_driver() -> Optional[str]:
             return p
     return None
 
-def create_driver(*, headless: bool = False, binary_path: Optional[str] = None, driver_path: Optional[str] = None) -> WebDriver:
+## ---------------- 持久化浏览器配置目录 ----------------
+# 每个进程(worker)独占 <root>/worker-N 目录, 通过文件锁避免并发实例共用同一 profile.
+# 磁盘缓存放在 profile/DiskCache 并由 Edge 按 --disk-cache-size 限制, 启动前再按 profile 总大小做淘汰.
+
+# 可安全删除的缓存子目录 (相对 profile 根目录), 淘汰时整目录删除 (不删单个文件, 以免破坏缓存索引),
+# 不影响 cookie 等登录状态
+_PROFILE_CACHE_SUBDIRS = [
+    "DiskCache",
+    os.path.join("Default", "Cache"),
+    os.path.join("Default", "Code Cache"),
+    os.path.join("Default", "GPUCache"),
+    os.path.join("Default", "Service Worker", "CacheStorage"),
+]
+
+
+def _lock_file(fh) -> None:
+    """非阻塞独占锁; 已被其他进程持有时抛出 OSError. 进程退出后由系统自动释放."""
+    try:
+        import msvcrt
+        fh.seek(0)
+        msvcrt.locking(fh.fileno(), msvcrt.LK_NBLCK, 1)
+    except ImportError:
+        import fcntl
+        fcntl.flock(fh.fileno(), fcntl.LOCK_EX | fcntl.LOCK_NB)
+
+
+def _dir_files(path: str) -> list[tuple[str, int, float]]:
+    """返回目录下所有文件 (路径, 大小, 修改时间)."""
+    files = []
+    for dirpath, _dirs, names in os.walk(path):
+        for name in names:
+            fp = os.path.join(dirpath, name)
+            try:
+                st = os.stat(fp)
+            except OSError:
+                continue
+            files.append((fp, st.st_size, st.st_mtime))
+    return files
+
+
+def _tree_bytes(path: str) -> int:
+    return sum(size for _, size, _ in _dir_files(path))
+
+
+@dataclass
+class BrowserProfile:
+    path: str
+    _lock_fh: Optional[object] = field(default=None, repr=False)
+
+    @classmethod
+    def acquire(cls, root: str, max_workers: int = 32) -> "BrowserProfile":
+        """在 root 下找到第一个未被占用的 worker-N 目录并加锁."""
+        os.makedirs(root, exist_ok=True)
+        for i in range(max_workers):
+            path = os.path.abspath(os.path.join(root, f"worker-{i}"))
+            os.makedirs(path, exist_ok=True)
+            fh = open(os.path.join(path, ".worker.lock"), "a+")
+            try:
+                _lock_file(fh)
+            except OSError:
+                fh.close()
+                continue
+            print(f"使用浏览器配置目录: {path}")
+            return cls(path=path, _lock_fh=fh)
+        raise RuntimeError(f"{root} 下 {max_workers} 个配置目录均被占用")
+
+    def release(self) -> None:
+        if self._lock_fh is not None:
+            try:
+                self._lock_fh.close()
+            except Exception:
+                pass
+            self._lock_fh = None
+
+    @property
+    def disk_cache_dir(self) -> str:
+        return os.path.join(self.path, "DiskCache")
+
+    def size_bytes(self) -> int:
+        return _tree_bytes(self.path)
+
+    def evict(self, max_bytes: int) -> int:
+        """profile 总大小超过 max_bytes 时, 从大到小整目录删除缓存子目录, 直到不超限. 返回释放的字节数.
+
+        Chromium 缓存后端有自己的索引文件, 只删部分文件会导致整个缓存被判定损坏, 因此按目录淘汰.
+        必须在浏览器未使用该目录时调用 (启动 Edge 之前或 quit 之后).
+        """
+        total = self.size_bytes()
+        if total <= max_bytes:
+            return 0
+        candidates = []
+        for sub in _PROFILE_CACHE_SUBDIRS:
+            path = os.path.join(self.path, sub)
+            if os.path.isdir(path):
+                candidates.append((path, _tree_bytes(path)))
+        candidates.sort(key=lambda item: item[1], reverse=True)
+        freed = 0
+        for path, size in candidates:
+            if total - freed <= max_bytes:
+                break
+            shutil.rmtree(path, ignore_errors=True)
+            freed += size - _tree_bytes(path)
+        print(f"配置目录超过上限 {max_bytes / (1024 * 1024):.0f}MB, 已清理缓存 {freed / (1024 * 1024):.1f}MB")
+        return freed
+
+
+def measure_cache_stats(driver: WebDriver) -> Optional[dict]:
+    """根据 Resource Timing 统计当前页面资源的缓存命中情况.
+
+    transferSize == 0 且 decodedBodySize > 0 视为命中缓存; 跨域且未开放 Timing-Allow-Origin 的资源
+    大小均为 0, 无法判断, 计入 unknown.
+    """
+    script = """
+        const entries = performance.getEntriesByType('resource');
+        let hits = 0, misses = 0, unknown = 0, bytes = 0;
+        for (const e of entries) {
+            if (e.decodedBodySize === 0 && e.transferSize === 0) { unknown++; continue; }
+            if (e.transferSize === 0) { hits++; } else { misses++; bytes += e.transferSize; }
+        }
+        return {resources: entries.length, hits: hits, misses: misses, unknown: unknown, transfer_bytes: bytes};
+    """
+    try:
+        stats = driver.execute_script(script)
+    except Exception:
+        return None
+    known = stats["hits"] + stats["misses"]
+    stats["hit_ratio"] = round(stats["hits"] / known, 3) if known else None
+    return stats
+
+
+def warm_cache(driver: WebDriver, url: str = WARMUP_URL) -> None:
+    """启动后先打开官网首页, 让公共 JS/CSS/字体进入磁盘缓存."""
+    try:
+        start = time.time()
+        driver.get(url)
+        stats = measure_cache_stats(driver) or {}
+        print(f"缓存预热完成: {url} 用时 {time.time() - start:.1f}s, 命中率 {stats.get('hit_ratio')}")
+    except Exception as e:
+        print(f"缓存预热失败 (忽略): {e}")
+
+
+def create_driver(*, headless: bool = False, binary_path: Optional[str] = None, driver_path: Optional[str] = None,
+                  profile: Optional[BrowserProfile] = None, disk_cache_mb: Optional[int] = None) -> WebDriver:
     """仅创建 Edge 浏览器驱动.
 
     优先使用 Selenium Manager 自动解析 msedgedriver; 若失败可手动指定 driver_path.
     Selenium 4.6+ 已内置 Selenium Manager, 不需要 webdriver-manager.
+    传入 profile 时使用持久化 user-data-dir (保留 HTTP 缓存), 否则每次为临时配置.
     """
     from selenium.webdriver.edge.options import Options as EdgeOptions
     from selenium.webdriver.edge.service import Service as EdgeServiceLocal
@@ -96,6 +258,11 @@ def create_driver(*, headless: bool = False, binary_path: Optional[str] = None,
         options.add_argument("--headless=new")
     options.add_argument("--disable-gpu")
     options.add_argument("--window-size=1280,900")
+    if profile is not None:
+        options.add_argument(f"--user-data-dir={profile.path}")
+        options.add_argument(f"--disk-cache-dir={profile.disk_cache_dir}")
+    if disk_cache_mb:
+        options.add_argument(f"--disk-cache-size={disk_cache_mb * 1024 * 1024}")
     if binary_path:
         options.binary_location = binary_path
 
@@ -128,9 +295,69 @@ def create_driver(*, headless: bool = False, binary_path: Optional[str] = None,
     return driver
 
 
+def open_browser(*, headless: bool = False, binary_path: Optional[str] = None, driver_path: Optional[str] = None,
+                 profile: Optional[BrowserProfile] = None, disk_cache_mb: Optional[int] = None,
+                 profile_max_mb: Optional[int] = None, warm: bool = False) -> WebDriver:
+    """创建浏览器; 使用持久化 profile 时先按上限淘汰旧缓存, 启动后可选预热缓存."""
+    if profile is not None and profile_max_mb:
+        profile.evict(profile_max_mb * 1024 * 1024)
+    driver = create_driver(headless=headless, binary_path=binary_path, driver_path=driver_path,
+                           profile=profile, disk_cache_mb=disk_cache_mb)
+    if warm:
+        warm_cache(driver)
+    return driver
+
+
 ## 已移除验证码自动处理函数 (wait_for_captcha_and_input)
 
 
+# 验证码容器/iframe 的精确选择器 (需对照官网验证码弹窗确认后填写, 如 "#captchaDialog"), 任一可见即视为验证码未处理.
+# 不要填写 [class*='verify'] 之类的模糊选择器: 误命中导航/搜索框会让每一单都等满 --settle 后失败.
+# 未填写时仍有 URL、运单号与 '展开详情' 三项检查兜底.
+CAPTCHA_SELECTORS: list[str] = []
+
+_DETAIL_NOT_READY = {
+    "redirected": "页面已跳转, 未停留在运单详情页",
+    "captcha": "页面出现验证码, 需在浏览器中手动处理",
+    "no_detail": "详情内容未加载 (页面中未找到运单号)",
+    "collapsed": "详情未展开, 需在浏览器中点击 '展开详情'",
+}
+
+
+def detail_not_ready_reason(driver: WebDriver, waybill: str) -> Optional[str]:
+    """检查详情页是否已可打印: 仍在详情 URL, 无可见验证码 (CAPTCHA_SELECTORS), 正文含运单号且已展开详情.
+
+    就绪返回 None, 否则返回原因说明.
+    """
+    script = """
+        const wb = arguments[0];
+        const visible = el => !!(el.offsetWidth || el.offsetHeight || el.getClientRects().length);
+        if (!location.href.includes(wb)) { return 'redirected'; }
+        for (const sel of arguments[1]) {
+            for (const el of document.querySelectorAll(sel)) { if (visible(el)) { return 'captcha'; } }
+        }
+        const text = document.body ? document.body.innerText : '';
+        if (!text.includes(wb)) { return 'no_detail'; }
+        if (text.includes('展开详情')) { return 'collapsed'; }
+        return '';
+    """
+    try:
+        code = driver.execute_script(script, waybill, CAPTCHA_SELECTORS)
+    except Exception as e:
+        return f"页面检查失败: {e}"
+    return _DETAIL_NOT_READY.get(code, code) if code else None
+
+
+def wait_for_detail(driver: WebDriver, waybill: str, timeout: float, poll: float = 0.5) -> Optional[str]:
+    """在 timeout 秒内轮询详情是否就绪 (期间可在浏览器手动处理验证码/展开详情). 超时返回最后的原因."""
+    deadline = time.time() + timeout
+    while True:
+        reason = detail_not_ready_reason(driver, waybill)
+        if reason is None or time.time() >= deadline:
+            return reason
+        time.sleep(poll)
+
+
 ## 自动查找并点击“展开详情”逻辑已移除，保留简洁核心功能。
 
 
@@ -159,8 +386,10 @@ def _print_page_to_pdf(driver: WebDriver, waybill: str, output_dir: str = "outpu
         return None
 
 
-def fetch_waybill_detail(waybill: str, *, headless: bool = False, binary_path: Optional[str] = None, driver_path: Optional[str] = None, debug: bool = False) -> WaybillResult:
-    driver = create_driver(headless=headless, binary_path=binary_path, driver_path=driver_path)
+def fetch_waybill_detail(waybill: str, *, headless: bool = False, binary_path: Optional[str] = None, driver_path: Optional[str] = None, debug: bool = False, driver: Optional[WebDriver] = None) -> WaybillResult:
+    """打开运单详情页. 传入已存在的 driver 时直接复用 (服务/多票模式), 否则新建浏览器."""
+    if driver is None:
+        driver = create_driver(headless=headless, binary_path=binary_path, driver_path=driver_path)
     url = BASE_URL.format(waybill=waybill)
     print(f"打开: {url}")
     driver.get(url)
@@ -180,16 +409,19 @@ def fetch_waybill_detail(waybill: str, *, headless: bool = False, binary_path: O
             print(f"调试文件保存失败: {e}")
     title = driver.title
     print(f"页面标题: {title}")
+    cache_stats = measure_cache_stats(driver)
+    if cache_stats and cache_stats["hit_ratio"] is not None:
+        print(f"缓存命中: {cache_stats['hits']}/{cache_stats['hits'] + cache_stats['misses']} ({cache_stats['hit_ratio']:.0%})")
 
     pdf_path = None
 
-    result = WaybillResult(waybill=waybill, page_title=title, pdf_path=pdf_path, driver=driver)
+    result = WaybillResult(waybill=waybill, page_title=title, pdf_path=pdf_path, driver=driver, cache_stats=cache_stats)
     # 保留窗口供进一步手动查看, 如需自动关闭可解除注释.
     # driver.quit()
     return result
 
 
-def launch_confirmation_ui(driver: WebDriver, waybill: str) -> Optional[str]:
+def launch_confirmation_ui(driver: WebDriver, waybill: str, output_dir: str = "output") -> Optional[str]:
     """启动 Tkinter UI:
     - 按钮 “确认”: 在你已于浏览器完成验证码+展开详情后，点击生成 PDF。
     - 按钮 “下一单”: 在 PDF 生成完成后可点击，退出程序 (关闭窗口与浏览器)。
@@ -200,7 +432,7 @@ def launch_confirmation_ui(driver: WebDriver, waybill: str) -> Optional[str]:
 
     if tk is None:
         input("请在浏览器中完成验证码与展开详情后按回车生成 PDF...")
-        pdf_path = _print_page_to_pdf(driver, waybill)
+        pdf_path = _print_page_to_pdf(driver, waybill, output_dir)
         input("PDF 已生成, 按回车退出程序...")
         try:
             driver.quit()
@@ -215,7 +447,7 @@ def launch_confirmation_ui(driver: WebDriver, waybill: str) -> Optional[str]:
         confirm_btn.config(state=tk.DISABLED)
         status_var.set("正在生成 PDF...")
         root.update_idletasks()
-        pdf_path = _print_page_to_pdf(driver, waybill)
+        pdf_path = _print_page_to_pdf(driver, waybill, output_dir)
         if pdf_path:
             status_var.set("PDF 已生成: 点击 '下一单' 退出")
             next_btn.config(state=tk.NORMAL)
@@ -261,29 +493,514 @@ def launch_confirmation_ui(driver: WebDriver, waybill: str) -> Optional[str]:
     root.mainloop()
     return pdf_path
 
+## ---------------- 常驻服务模式 ----------------
+# 保持一个预热的浏览器, 通过本地 HTTP / Unix socket 接收运单提交, 排队依次生成 PDF.
+# 打印前检查详情是否就绪; 若弹出验证码或未展开详情, 需在 --settle 秒内于 (非 headless) 浏览器窗口中手动处理,
+# 否则该单返回错误而不生成 PDF.
+
+@dataclass
+class WaybillJob:
+    waybill: str
+    submitted_at: float = field(default_factory=time.time)
+    started_at: Optional[float] = None
+    finished_at: Optional[float] = None
+    pdf_path: Optional[str] = None
+    error: Optional[str] = None
+    done: threading.Event = field(default_factory=threading.Event, repr=False)
+
+    @property
+    def ok(self) -> bool:
+        return self.pdf_path is not None and self.error is None
+
+    def to_dict(self) -> dict:
+        d = {"waybill": self.waybill, "ok": self.ok, "pdf_path": self.pdf_path, "error": self.error}
+        if self.started_at is not None:
+            d["wait_s"] = round(self.started_at - self.submitted_at, 3)
+        if self.finished_at is not None and self.started_at is not None:
+            d["render_s"] = round(self.finished_at - self.started_at, 3)
+        return d
+
+
+class WaybillService:
+    """复用同一个 Edge 实例按提交顺序处理运单, 并统计队列深度与耗时."""
+
+    def __init__(self, *, headless: bool = False, binary_path: Optional[str] = None, driver_path: Optional[str] = None,
+                 output_dir: str = "output", settle: float = 30.0, debug: bool = False,
+                 profile_root: Optional[str] = None, disk_cache_mb: Optional[int] = None,
+                 profile_max_mb: Optional[int] = None, warm: bool = False, profile_check_every: int = 50):
+        self.headless = headless
+        self.binary_path = binary_path
+        self.driver_path = driver_path
+        self.profile_root = profile_root
+        self.disk_cache_mb = disk_cache_mb
+        self.profile_max_mb = profile_max_mb
+        self.warm = warm
+        self.profile_check_every = profile_check_every  # 每处理 N 单检查一次 profile 大小
+        self._profile: Optional[BrowserProfile] = None
+        self._jobs_since_check = 0
+        self.output_dir = output_dir
+        self.settle = settle
+        self.debug = debug
+        self._queue: "queue.Queue[Optional[WaybillJob]]" = queue.Queue()
+        self._driver: Optional[WebDriver] = None
+        self._worker: Optional[threading.Thread] = None
+        self._lock = threading.Lock()
+        self._current: Optional[WaybillJob] = None
+        self._started_at = time.time()
+        self._processed = 0
+        self._failed = 0
+        self._latencies: deque = deque(maxlen=500)  # (排队等待, 处理耗时) 秒
+        self._cache_hits = 0
+        self._cache_misses = 0
+
+    # 生命周期
+    def start(self, *, launch_browser: bool = True) -> bool:
+        """启动工作线程; launch_browser 时立即启动浏览器 (否则推迟到第一单). 浏览器启动失败时打印原因并返回 False."""
+        if launch_browser:
+            try:
+                self._ensure_driver()
+            except Exception as e:
+                print(f"服务: 浏览器启动失败: {e}")
+                self.stop()
+                return False
+        self._worker = threading.Thread(target=self._run, name="waybill-worker", daemon=True)
+        self._worker.start()
+        return True
+
+    def stop(self) -> None:
+        # 丢弃尚未开始的任务 (如 Ctrl+C 中断时), 只等待正在处理的一单
+        while True:
+            try:
+                pending = self._queue.get_nowait()
+            except queue.Empty:
+                break
+            if pending is not None:
+                pending.error = "服务已停止"
+                pending.done.set()
+            self._queue.task_done()
+        if self._worker:
+            self._queue.put(None)
+            self._worker.join(timeout=30)
+            self._worker = None
+        self._quit_driver()
+        if self._profile:
+            self._profile.release()
+            self._profile = None
+
+    def submit(self, waybill: str) -> WaybillJob:
+        waybill = waybill.strip()
+        if not is_valid_waybill(waybill):
+            raise ValueError(f"无效运单号: {waybill!r}")
+        job = WaybillJob(waybill=waybill)
+        self._queue.put(job)
+        return job
+
+    # 浏览器
+    def _ensure_driver(self) -> WebDriver:
+        if self._driver is None:
+            print("服务: 启动浏览器...")
+            if self.profile_root and self._profile is None:
+                self._profile = BrowserProfile.acquire(self.profile_root)
+            self._driver = open_browser(
+                headless=self.headless,
+                binary_path=self.binary_path,
+                driver_path=self.driver_path,
+                profile=self._profile,
+                disk_cache_mb=self.disk_cache_mb,
+                profile_max_mb=self.profile_max_mb,
+                warm=self.warm,
+            )
+        return self._driver
+
+    def _quit_driver(self) -> None:
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            except Exception:
+                pass
+            self._driver = None
+
+    def _enforce_profile_limit(self) -> None:
+        """长时间运行时每 N 单检查 profile 大小; 超限则关闭浏览器并淘汰缓存, 下一单重新启动.
+
+        --disk-cache-size 只限制 HTTP 缓存, Code Cache / CacheStorage 仍会增长, 需要在这里兜底.
+        """
+        if self._profile is None or not self.profile_max_mb or self.profile_check_every <= 0:
+            return
+        self._jobs_since_check += 1
+        if self._jobs_since_check < self.profile_check_every:
+            return
+        self._jobs_since_check = 0
+        max_bytes = self.profile_max_mb * 1024 * 1024
+        if self._profile.size_bytes() <= max_bytes:
+            return
+        print("服务: 配置目录超过上限, 重启浏览器并清理缓存")
+        self._quit_driver()
+        self._profile.evict(max_bytes)
+
+    def _drop_driver_if_dead(self) -> None:
+        """浏览器崩溃或被手动关闭时丢弃实例, 下一单重新创建."""
+        if self._driver is None:
+            return
+        try:
+            _ = self._driver.window_handles
+        except Exception:
+            print("服务: 浏览器已失效, 下一单将重新启动")
+            self._quit_driver()
+
+    # 工作线程
+    def _run(self) -> None:
+        while True:
+            job = self._queue.get()
+            if job is None:
+                self._queue.task_done()
+                break
+            with self._lock:
+                self._current = job
+            job.started_at = time.time()
+            try:
+                driver = self._ensure_driver()
+                result = fetch_waybill_detail(job.waybill, driver=driver, debug=self.debug)
+                if result.cache_stats:
+                    with self._lock:
+                        self._cache_hits += result.cache_stats["hits"]
+                        self._cache_misses += result.cache_stats["misses"]
+                reason = wait_for_detail(driver, job.waybill, self.settle)
+                if reason:
+                    job.error = f"详情未就绪: {reason}"
+                else:
+                    job.pdf_path = _print_page_to_pdf(driver, job.waybill, self.output_dir)
+                    if not job.pdf_path:
+                        job.error = "PDF 生成失败"
+            except Exception as e:
+                job.error = str(e)
+                self._drop_driver_if_dead()
+            finally:
+                job.finished_at = time.time()
+                with self._lock:
+                    self._current = None
+                    self._processed += 1
+                    if not job.ok:
+                        self._failed += 1
+                    self._latencies.append((job.started_at - job.submitted_at, job.finished_at - job.started_at))
+                job.done.set()
+                self._queue.task_done()
+            try:
+                self._enforce_profile_limit()
+            except Exception as e:
+                print(f"服务: 配置目录清理失败: {e}")
+
+    def metrics(self) -> dict:
+        with self._lock:
+            samples = list(self._latencies)
+            in_flight = self._current.waybill if self._current else None
+            processed, failed = self._processed, self._failed
+            cache_hits, cache_misses = self._cache_hits, self._cache_misses
+        totals = sorted(w + r for w, r in samples)
+
+        def _avg(values) -> Optional[float]:
+            values = list(values)
+            return round(sum(values) / len(values), 3) if values else None
+
+        return {
+            "queue_depth": self._queue.qsize(),
+            "in_flight": in_flight,
+            "processed": processed,
+            "failed": failed,
+            "browser_ready": self._driver is not None,
+            "uptime_s": round(time.time() - self._started_at, 1),
+            "avg_wait_s": _avg(w for w, _ in samples),
+            "avg_render_s": _avg(r for _, r in samples),
+            "avg_latency_s": _avg(totals),
+            "p95_latency_s": round(totals[int(0.95 * (len(totals) - 1))], 3) if totals else None,
+            "max_latency_s": round(totals[-1], 3) if totals else None,
+            "cache_hits": cache_hits,
+            "cache_misses": cache_misses,
+            "cache_hit_ratio": round(cache_hits / (cache_hits + cache_misses), 3) if cache_hits + cache_misses else None,
+            "profile_dir": self._profile.path if self._profile else None,
+        }
+
+
+class _ServiceHandler(BaseHTTPRequestHandler):
+    """本地 API:
+    - GET  /metrics                         队列深度与耗时统计
+    - GET  /waybill/<运单号>[?format=pdf]    提交单票并等待, 返回 PDF 路径(JSON) 或 PDF 字节
+    - POST /waybills                         JSON {"waybills": [...], "format": "path"|"pdf", "wait": true}
+                                             或纯文本 (每行一个运单号)
+    """
+    service: WaybillService
+    job_timeout: float = 300.0
+
+    def address_string(self) -> str:
+        # Unix socket 下 client_address 不是 (host, port)
+        if isinstance(self.client_address, tuple) and self.client_address:
+            return str(self.client_address[0])
+        return "unix"
+
+    def _send_json(self, status: int, payload) -> None:
+        body = json.dumps(payload, ensure_ascii=False).encode("utf-8")
+        self.send_response(status)
+        self.send_header("Content-Type", "application/json; charset=utf-8")
+        self.send_header("Content-Length", str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def _send_pdf(self, job: WaybillJob) -> None:
+        with open(job.pdf_path, "rb") as f:
+            data = f.read()
+        self.send_response(200)
+        self.send_header("Content-Type", "application/pdf")
+        self.send_header("Content-Length", str(len(data)))
+        self.send_header("Content-Disposition", f'attachment; filename="{os.path.basename(job.pdf_path)}"')
+        self.end_headers()
+        self.wfile.write(data)
+
+    def _job_payload(self, job: WaybillJob, fmt: str) -> dict:
+        d = job.to_dict()
+        if not job.done.is_set():
+            d["error"] = "等待超时, 仍在队列中处理"
+        elif fmt == "pdf" and job.ok:
+            with open(job.pdf_path, "rb") as f:
+                d["pdf_base64"] = base64.b64encode(f.read()).decode("ascii")
+        return d
+
+    def do_GET(self):
+        url = urlparse(self.path)
+        if url.path == "/metrics":
+            self._send_json(200, self.service.metrics())
+            return
+        if url.path.startswith("/waybill/"):
+            waybill = url.path[len("/waybill/"):].strip("/ ")
+            if not is_valid_waybill(waybill):
+                self._send_json(400, {"error": f"无效运单号: {waybill!r}"})
+                return
+            fmt = parse_qs(url.query).get("format", ["path"])[0]
+            job = self.service.submit(waybill)
+            job.done.wait(self.job_timeout)
+            if fmt == "pdf" and job.done.is_set() and job.ok:
+                self._send_pdf(job)
+                return
+            status = 200 if job.ok else (504 if not job.done.is_set() else 500)
+            self._send_json(status, self._job_payload(job, "path"))
+            return
+        self._send_json(404, {"error": f"未知路径: {url.path}"})
+
+    def do_POST(self):
+        url = urlparse(self.path)
+        if url.path != "/waybills":
+            self._send_json(404, {"error": f"未知路径: {url.path}"})
+            return
+        try:
+            length = int(self.headers.get("Content-Length") or 0)
+            if length < 0:
+                raise ValueError(length)
+            raw = self.rfile.read(length).decode("utf-8") if length else ""
+        except ValueError:
+            self._send_json(400, {"error": "Content-Length 或请求体编码无效"})
+            return
+        fmt, wait = "path", True
+        if "json" in (self.headers.get("Content-Type") or "") or raw.lstrip().startswith(("{", "[")):
+            try:
+                req = json.loads(raw or "{}")
+            except ValueError as e:
+                self._send_json(400, {"error": f"JSON 解析失败: {e}"})
+                return
+            if not isinstance(req, dict):
+                self._send_json(400, {"error": "请求体必须是 JSON 对象"})
+                return
+            waybills = req.get("waybills", [])
+            if not isinstance(waybills, list) or not all(isinstance(w, str) for w in waybills):
+                self._send_json(400, {"error": "waybills 必须是字符串列表"})
+                return
+            fmt = req.get("format", fmt)
+            if fmt not in ("path", "pdf"):
+                self._send_json(400, {"error": "format 只能是 'path' 或 'pdf'"})
+                return
+            wait = req.get("wait", wait)
+            if not isinstance(wait, bool):
+                self._send_json(400, {"error": "wait 必须是 true 或 false"})
+                return
+        else:
+            waybills = raw.splitlines()
+        waybills = [w.strip() for w in waybills if w.strip()]
+        if not waybills:
+            self._send_json(400, {"error": "缺少运单号"})
+            return
+        invalid = [w for w in waybills if not is_valid_waybill(w)]
+        if invalid:
+            self._send_json(400, {"error": "无效运单号", "invalid": invalid})
+            return
+        jobs = [self.service.submit(w) for w in waybills]
+        if not wait:
+            self._send_json(202, {"submitted": waybills, "queue_depth": self.service.metrics()["queue_depth"]})
+            return
+        deadline = time.time() + self.job_timeout
+        for job in jobs:
+            job.done.wait(max(0.0, deadline - time.time()))
+        self._send_json(200, {"results": [self._job_payload(job, fmt) for job in jobs]})
+
+
+if hasattr(socketserver, "UnixStreamServer"):
+    class _UnixHTTPServer(socketserver.ThreadingMixIn, socketserver.UnixStreamServer):
+        daemon_threads = True
+else:
+    _UnixHTTPServer = None
+
+
+def check_listen_args(port: Optional[int], unix_socket: Optional[str]) -> Optional[str]:
+    """校验监听参数, 有问题返回错误说明."""
+    if not port and not unix_socket:
+        return "未指定监听端口或 Unix socket"
+    if unix_socket and _UnixHTTPServer is None:
+        return "当前系统不支持 Unix socket, 请改用 --port"
+    return None
+
+
+def serve(service: WaybillService, *, host: str = "127.0.0.1", port: Optional[int] = 8765,
+          unix_socket: Optional[str] = None, job_timeout: float = 300.0) -> int:
+    """先打开监听, 再启动服务 (浏览器), 阻塞运行直到 Ctrl+C. 返回进程退出码.
+
+    service 应尚未 start(); 监听失败时不会启动浏览器.
+    """
+    error = check_listen_args(port, unix_socket)
+    if error:
+        print(f"服务: {error}")
+        return 2
+    handler = type("WaybillServiceHandler", (_ServiceHandler,), {"service": service, "job_timeout": job_timeout})
+    servers = []
+    try:
+        if port:
+            servers.append(ThreadingHTTPServer((host, port), handler))
+            print(f"服务: HTTP 监听 http://{host}:{port}")
+        if unix_socket:
+            if os.path.exists(unix_socket):
+                os.remove(unix_socket)
+            servers.append(_UnixHTTPServer(unix_socket, handler))
+            print(f"服务: Unix socket 监听 {unix_socket}")
+    except OSError as e:
+        print(f"服务: 监听失败: {e}")
+        for srv in servers:
+            srv.server_close()
+        return 1
+    try:
+        if not service.start():
+            return 1
+        for srv in servers[1:]:
+            threading.Thread(target=srv.serve_forever, daemon=True).start()
+        servers[0].serve_forever()
+    except KeyboardInterrupt:
+        print("服务: 正在退出...")
+    finally:
+        for srv in servers:
+            srv.server_close()
+        if unix_socket and os.path.exists(unix_socket):
+            os.remove(unix_socket)
+        service.stop()
+    return 0
+
+
+def _read_waybills(args_waybills: list[str], use_stdin: bool) -> list[str]:
+    waybills = [w.strip() for w in args_waybills if w.strip()]
+    if use_stdin:
+        for line in sys.stdin:
+            waybills.extend(part for part in line.replace(",", " ").split() if part)
+    return waybills
+
 
 def main(argv: list[str]) -> int:
     import argparse
     parser = argparse.ArgumentParser(description="顺丰运单详情自动化操作")
-    parser.add_argument("waybill", help="顺丰运单号")
+    parser.add_argument("waybills", nargs="*", metavar="waybill", help="顺丰运单号 (可多个; 多个时复用同一浏览器自动生成 PDF)")
+    parser.add_argument("--stdin", action="store_true", help="从标准输入读取运单号 (空白/逗号分隔)")
+    parser.add_argument("--serve", action="store_true", help="常驻服务模式: 保持浏览器预热, 通过本地 API 接收运单")
+    parser.add_argument("--host", default="127.0.0.1", help="服务模式 HTTP 监听地址 (默认仅本机)")
+    parser.add_argument("--port", type=int, default=8765, help="服务模式 HTTP 端口, 0 表示不启用 HTTP")
+    parser.add_argument("--unix-socket", dest="unix_socket", help="服务模式额外监听的 Unix socket 路径")
+    parser.add_argument("--settle", type=float, default=30.0, help="自动模式下等待详情就绪 (验证码已处理且已展开详情) 的最长秒数, 超时则该单失败")
+    parser.add_argument("--job-timeout", dest="job_timeout", type=float, default=300.0, help="服务模式单次请求最长等待秒数")
+    parser.add_argument("--output-dir", dest="output_dir", default="output", help="PDF 输出目录")
+    parser.add_argument("--profile-dir", dest="profile_dir", help="持久化浏览器配置根目录 (每个实例独占其中 worker-N 子目录, 保留 HTTP 缓存)")
+    parser.add_argument("--disk-cache-mb", dest="disk_cache_mb", type=int, default=256, help="持久化配置下 Edge 磁盘缓存上限 (MB)")
+    parser.add_argument("--profile-max-mb", dest="profile_max_mb", type=int, default=1024, help="配置目录总大小上限 (MB), 启动前及运行中超出时整目录清理缓存")
+    parser.add_argument("--profile-check-every", dest="profile_check_every", type=int, default=50, help="服务/多票模式每处理 N 单检查配置目录大小, 超限时重启浏览器并清理缓存 (0 表示不检查)")
+    parser.add_argument("--warm", dest="warm", action="store_true", default=None, help="使用持久化配置时启动后先预热官网首页 (服务/多票模式默认开启, 单票默认关闭)")
+    parser.add_argument("--no-warm", dest="warm", action="store_false", help="跳过启动预热")
     parser.add_argument("--headless", action="store_true", help="Edge 无头模式运行 (不建议与 UI 同用)")
     parser.add_argument("--binary-path", dest="binary_path", help="Edge 浏览器可执行文件路径(可选)")
     parser.add_argument("--driver-path", dest="driver_path", help="手动指定 msedgedriver.exe 路径, Selenium Manager 失败时使用")
     parser.add_argument("--debug", action="store_true", help="失败时保存页面源码与截图")
     args = parser.parse_args(argv[1:])
-
+    waybills = _read_waybills(args.waybills, args.stdin)
+    invalid = [w for w in waybills if not is_valid_waybill(w)]
+    if invalid:
+        parser.error(f"无效运单号 (仅允许 6-32 位字母数字): {', '.join(invalid)}")
+
+    if args.serve or len(waybills) > 1:
+        service = WaybillService(
+            headless=args.headless,
+            binary_path=args.binary_path,
+            driver_path=args.driver_path,
+            output_dir=args.output_dir,
+            settle=args.settle,
+            debug=args.debug,
+            profile_root=args.profile_dir,
+            disk_cache_mb=args.disk_cache_mb if args.profile_dir else None,
+            profile_max_mb=args.profile_max_mb,
+            warm=args.warm is not False and bool(args.profile_dir),
+            profile_check_every=args.profile_check_every,
+        )
+        if args.serve:
+            error = check_listen_args(args.port, args.unix_socket)
+            if error:
+                parser.error(error)
+            jobs = [service.submit(w) for w in waybills]
+            if jobs:
+                print(f"服务: 已排队 {len(jobs)} 个命令行运单")
+            return serve(service, host=args.host, port=args.port, unix_socket=args.unix_socket, job_timeout=args.job_timeout)
+        if not service.start():
+            return 1
+        try:
+            jobs = [service.submit(w) for w in waybills]
+            for job in jobs:
+                job.done.wait()
+                print(json.dumps(job.to_dict(), ensure_ascii=False))
+            print(json.dumps(service.metrics(), ensure_ascii=False))
+        except KeyboardInterrupt:
+            print("已中断, 正在关闭浏览器...")
+            return 130
+        finally:
+            # 必须关闭浏览器, 否则残留的 Edge 仍占用 profile 目录, 下次启动会报目录被占用
+            service.stop()
+        return 0 if all(job.ok for job in jobs) else 1
+
+    if not waybills:
+        parser.error("请提供运单号, 或使用 --stdin / --serve")
+    waybill = waybills[0]
+    driver = None
+    if args.profile_dir:
+        profile = BrowserProfile.acquire(args.profile_dir)
+        driver = open_browser(
+            headless=args.headless,
+            binary_path=args.binary_path,
+            driver_path=args.driver_path,
+            profile=profile,
+            disk_cache_mb=args.disk_cache_mb,
+            profile_max_mb=args.profile_max_mb,
+            warm=bool(args.warm),  # 单票只打开一页, 预热会多一次页面加载, 默认不做
+        )
     result = fetch_waybill_detail(
-        args.waybill,
+        waybill,
         headless=args.headless,
         binary_path=args.binary_path,
         driver_path=args.driver_path,
         debug=args.debug,
+        driver=driver,
     )
 
     # 默认启动 UI
     print("已打开运单页面。请在浏览器完成验证码与展开详情后, 使用弹出的窗口生成 PDF。")
     if result.driver:
-        pdf_path = launch_confirmation_ui(driver=result.driver, waybill=args.waybill)
+        pdf_path = launch_confirmation_ui(driver=result.driver, waybill=waybill, output_dir=args.output_dir)
         if pdf_path:
             result.pdf_path = pdf_path
         else: